@@ -1,14 +1,37 @@
 import os
 import asyncio
-import base64
-import json
+import collections
+import functools
+import gzip
+import hashlib
+import itertools
+import pathlib
+import re
+import socket
+import struct
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 import logging
+import aiofiles
 import aiohttp
+import orjson
 from aiohttp import web, ClientSession
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+# SIMD-accelerated base64 when available; stdlib is API-compatible as a fallback
+try:
+    import pybase64 as base64
+    b64encode_str = base64.b64encode_as_string
+except ImportError:
+    import base64
+
+    def b64encode_str(data: bytes) -> str:
+        return base64.b64encode(data).decode('ascii')
+
 
 # Load environment variables from .env (if present) before reading any env vars
 load_dotenv()
@@ -31,26 +54,216 @@ class _AccessPathFilter(logging.Filter):
             return True
         return not any(path in message for path in self._suppressed_paths)
 
-# Hide access logs for /get_frame_buffer only (keep other endpoints visible)
+# Hide access logs for the frame polling endpoints (keep other endpoints visible)
 logging.getLogger('aiohttp.access').addFilter(
-    _AccessPathFilter(['/get_frame_buffer'])
+    _AccessPathFilter(['/get_frame_buffer', '/frame_index', '/frame/'])
 )
 
 
 # Storage
 UPLOAD_FOLDER = 'uploads'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+INDEX_HTML_PATH = os.path.join('templates', 'index.html')
+# Seconds between stat() checks for template edits; 0 re-checks on every page load
+INDEX_HTML_RECHECK = float(os.getenv('INDEX_HTML_RECHECK', '1.0'))
 
 # Config
 MAX_AUDIO_SIZE = 100 * 1024 * 1024  # 100MB
+FRAME_BUFFER_MAX = int(os.getenv('FRAME_BUFFER_MAX', '10000'))
+# Byte budget for buffered frames; the oldest are dropped first once exceeded
+FRAME_BUFFER_MAX_BYTES = int(os.getenv('FRAME_BUFFER_MAX_BYTES', str(512 * 1024 * 1024)))
+# Log every Nth NDJSON frame batch (0 disables the per-batch ingest log)
+FRAME_LOG_EVERY = int(os.getenv('FRAME_LOG_EVERY', '1'))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+NDJSON_COMPACT_THRESHOLD = 64 * 1024
+AUDIO_DATA_URL_PREFIX = b'data:audio/wav;base64,'
+# Default executor size; it runs every aiofiles call plus the base64/hash offloads
+# (0 keeps asyncio's min(32, cpu_count + 4))
+THREAD_POOL_SIZE = int(os.getenv('THREAD_POOL_SIZE', '0'))
+# Most frames returned per /get_frame_buffer or /frame_index response; clients
+# page through the rest with next_index
+FRAME_PAGE_MAX = int(os.getenv('FRAME_PAGE_MAX', '200'))
+# Seconds a probe reuses its last DNS answer for the MuseTalk host (0 resolves on every
+# probe; responses report dns_cached so a warm answer is not mistaken for a fresh lookup)
+PROBE_DNS_TTL = float(os.getenv('PROBE_DNS_TTL', '30'))
+# Upper bound for ?wait= on the frame polling endpoints
+LONG_POLL_MAX = 25.0
 MUSETALK_URL = os.getenv('MUSETALK_URL', 'http://localhost:8085')
+# OpenAI models, voice and prompts, read once instead of per request
+TRANSCRIBE_MODEL = os.getenv('TRANSCRIBE_MODEL', 'whisper-1')
+CHAT_MODEL = os.getenv('CHAT_MODEL', 'gpt-4o-mini')
+# Stripped once so the system message is a byte-identical prefix on every call,
+# which is what OpenAI's automatic prompt caching matches on
+SYSTEM_PROMPT = os.getenv('SYSTEM_PROMPT', 'You are a concise, helpful assistant.').strip()
+REALTIME_MODEL = os.getenv('REALTIME_MODEL', 'gpt-4o-mini-tts')
+REALTIME_PROMPT = os.getenv('SYSTEM_PROMPT', 'You are a concise, helpful assistant. Please respond to the user audio.').strip()
+TTS_VOICE = os.getenv('TTS_VOICE', 'alloy')
+TTS_MODEL = os.getenv('TTS_MODEL', 'tts-1')
+FFMPEG_PATH = os.getenv('FFMPEG_PATH', 'ffmpeg')
+# Opt-in: stream the chat answer and start TTS on sentence runs of at least this many
+# characters while the rest is generated. Segments are voiced separately, so prosody
+# can reset between them (0 = one TTS call for the whole answer)
+TTS_SEGMENT_CHARS = int(os.getenv('TTS_SEGMENT_CHARS', '0'))
+# Pipeline answers kept for repeated utterances (0 disables the cache)
+RESPONSE_CACHE_MAX = int(os.getenv('RESPONSE_CACHE_MAX', '32'))
+# Pull frames from MuseTalk's /mjpeg_stream as raw JPEG instead of decoding the
+# base64 frames carried in the NDJSON callback (which then only carries status)
+USE_MJPEG_INGEST = os.getenv('USE_MJPEG_INGEST', '0').strip().lower() in ('1', 'true', 'yes')
 
 # State
-frame_buffer = []
+frame_buffer = collections.deque(maxlen=FRAME_BUFFER_MAX)
+# Absolute index of frame_buffer[0]; advances as the deque evicts old frames (and
+# past the whole buffer on /clear_buffer) so client-side indices (from_index,
+# MJPEG read position) stay valid
+frame_base_index = 0
+# Sum of len(mjpeg_part) over frame_buffer, and frames evicted to respect the caps
+frame_buffer_bytes = 0
+frames_evicted = 0
+# Set (then dropped) whenever frames arrive or the session state changes, to
+# wake every MJPEG viewer at once instead of having each one poll. Created lazily
+# by the first waiter: before 3.10 an Event binds the loop current at construction,
+# and at import time that is not the loop aiohttp runs
+frame_event = None
 processing_complete = False
 start_signal_received = False
+# Pipeline cache: key -> (transcript, answer, mp3 bytes), least recently used first
+response_cache = collections.OrderedDict()
+
+
+# Frame timestamps only need ~ms resolution; reuse the formatted string for 5 ms
+_TIMESTAMP_TTL = 0.005
+_timestamp_cache = ['', 0.0]  # [iso string, monotonic time it was made]
+
+
+def _now_iso() -> str:
+    now = time.monotonic()
+    if now - _timestamp_cache[1] >= _TIMESTAMP_TTL:
+        _timestamp_cache[0] = datetime.now().isoformat()
+        _timestamp_cache[1] = now
+    return _timestamp_cache[0]
+
+
+class _Frame:
+    """One buffered frame; slots keep per-frame overhead well below a dict."""
+    __slots__ = ('frame_number', 'mjpeg_part', 'frame_bytes', 'timestamp')
+
+    def __init__(self, frame_number, mjpeg_part: bytes, frame_bytes: memoryview, timestamp: str):
+        self.frame_number = frame_number
+        self.mjpeg_part = mjpeg_part  # complete multipart chunk, written as-is to every viewer
+        self.frame_bytes = frame_bytes  # raw JPEG: a view into mjpeg_part, not a copy
+        self.timestamp = timestamp
+
+
+def _append_frame(frame_number, jpeg, timestamp: str) -> None:
+    """Buffer a frame; jpeg may be any bytes-like object and is copied exactly once."""
+    global frame_base_index, frame_buffer_bytes, frames_evicted
+    header = MJPEG_FRAME_HEADER % len(jpeg)
+    # Build the MJPEG part once here instead of once per viewer per frame
+    mjpeg_part = b''.join((header, jpeg, MJPEG_FRAME_TRAILER))
+    frame_bytes = memoryview(mjpeg_part)[len(header):len(mjpeg_part) - len(MJPEG_FRAME_TRAILER)]
+    frame_buffer_bytes += len(mjpeg_part)
+    # Over the byte budget: drop oldest frames; lagging viewers skip ahead past them
+    while frame_buffer_bytes > FRAME_BUFFER_MAX_BYTES and frame_buffer:
+        frame_buffer_bytes -= len(frame_buffer.popleft().mjpeg_part)
+        frame_base_index += 1
+        frames_evicted += 1
+    if len(frame_buffer) == frame_buffer.maxlen:
+        # Full: recycle the record being evicted instead of allocating a new one
+        entry = frame_buffer.popleft()
+        frame_base_index += 1
+        frames_evicted += 1
+        frame_buffer_bytes -= len(entry.mjpeg_part)
+        entry.frame_number = frame_number
+        entry.mjpeg_part = mjpeg_part
+        entry.frame_bytes = frame_bytes
+        entry.timestamp = timestamp
+    else:
+        entry = _Frame(frame_number, mjpeg_part, frame_bytes, timestamp)
+    frame_buffer.append(entry)
+
+
+def _frame_waiter() -> asyncio.Event:
+    """Return the event the next notification sets, creating it on the running loop."""
+    global frame_event
+    if frame_event is None:
+        frame_event = asyncio.Event()
+    return frame_event
+
+
+def _notify_frame_waiters() -> None:
+    global frame_event
+    if frame_event is not None:
+        frame_event.set()
+        frame_event = None
+
+
+def _response_cache_key(audio_digest: bytes) -> str:
+    # Any change of model, voice or prompt must miss the cache
+    h = hashlib.sha256(audio_digest)
+    for part in (TRANSCRIBE_MODEL, CHAT_MODEL, SYSTEM_PROMPT, TTS_MODEL, TTS_VOICE):
+        h.update(b'\0' + part.encode('utf-8'))
+    return h.hexdigest()
+
+
+def _response_cache_put(key: str, entry: tuple) -> None:
+    response_cache[key] = entry
+    response_cache.move_to_end(key)
+    while len(response_cache) > RESPONSE_CACHE_MAX:
+        response_cache.popitem(last=False)
+
+
+def json_response(data, status: int = 200) -> web.Response:
+    # orjson serializes straight to bytes, skipping stdlib json's str round-trip
+    return web.Response(body=orjson.dumps(data), status=status, content_type='application/json')
+
+
+@functools.lru_cache(maxsize=64)
+def normalize_musetalk_url(url: str) -> str:
+    """Strip a trailing slash and default to http:// (cached; the base URL rarely changes)."""
+    url = str(url).strip()
+    if url.endswith('/'):
+        url = url[:-1]
+    if not (url.startswith('http://') or url.startswith('https://')):
+        url = 'http://' + url
+    return url
+
+
+# Long-lived HTTP clients, created in client_sessions_ctx
+MUSETALK_SESSION = web.AppKey('musetalk_session', ClientSession)
+PROBE_SESSION = web.AppKey('probe_session', ClientSession)
+OPENAI_CLIENT = web.AppKey('openai_client', AsyncOpenAI)
+
+
+async def client_sessions_ctx(app: web.Application):
+    # Pooled keep-alive connections to MuseTalk instead of a new session per request
+    app[MUSETALK_SESSION] = ClientSession(
+        timeout=aiohttp.ClientTimeout(total=120),
+        connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60),
+    )
+    # Health probes use tight timeouts and prefer IPv4
+    app[PROBE_SESSION] = ClientSession(
+        timeout=aiohttp.ClientTimeout(total=5, connect=2, sock_connect=2, sock_read=3),
+        connector=aiohttp.TCPConnector(ssl=False, family=socket.AF_INET),
+    )
+    # One async OpenAI client per app; its calls run on the loop instead of worker threads
+    openai_api_key = os.getenv('OPENAI_API_KEY')
+    app[OPENAI_CLIENT] = AsyncOpenAI(api_key=openai_api_key) if openai_api_key else None
+    yield
+    await _stop_mjpeg_ingest()
+    await app[MUSETALK_SESSION].close()
+    await app[PROBE_SESSION].close()
+    if app[OPENAI_CLIENT] is not None:
+        await app[OPENAI_CLIENT].close()
+
 
 # CORS middleware
+CORS_HEADERS = {
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+    'Access-Control-Allow-Credentials': 'false',
+}
+
+
 @web.middleware
 async def cors_middleware(request, handler):
     # Handle preflight
@@ -58,60 +271,210 @@ async def cors_middleware(request, handler):
         resp = web.Response(status=200)
     else:
         resp = await handler(request)
-    origin = request.headers.get('Origin', '*')
-    resp.headers['Access-Control-Allow-Origin'] = origin
-    resp.headers['Vary'] = 'Origin'
-    resp.headers['Access-Control-Allow-Methods'] = 'GET,POST,OPTIONS'
-    resp.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-    resp.headers['Access-Control-Allow-Credentials'] = 'false'
+    if resp.prepared:
+        # Streaming responses (MJPEG) already sent their headers
+        return resp
+    resp.headers.update(CORS_HEADERS)
+    # Added rather than set so a handler's own Vary (e.g. Accept-Encoding) survives
+    resp.headers.add('Vary', 'Origin')
+    resp.headers['Access-Control-Allow-Origin'] = request.headers.get('Origin', '*')
     return resp
 
 
+# (file key, body, gzip body, ETag) of the last index.html read
+_index_html = None
+_index_html_checked = 0.0
+
+
+def _load_index_html():
+    """Return the cached page, re-reading it only when the file changes on disk."""
+    global _index_html, _index_html_checked
+    now = time.monotonic()
+    if _index_html is not None and now - _index_html_checked < INDEX_HTML_RECHECK:
+        return _index_html
+    _index_html_checked = now
+    st = os.stat(INDEX_HTML_PATH)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _index_html
+    if cached is None or cached[0] != key:
+        with open(INDEX_HTML_PATH, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+        cached = _index_html = (key, body, gzip.compress(body, 6), etag)
+    return cached
+
+
 async def index_handler(request: web.Request) -> web.Response:
+    # Served from memory, pre-compressed once, with an ETag so reloads get 304s
     try:
-        with open(os.path.join('templates', 'index.html'), 'r', encoding='utf-8') as f:
-            html = f.read()
-        return web.Response(text=html, content_type='text/html')
+        _, body, body_gz, etag = _load_index_html()
     except FileNotFoundError:
         return web.Response(text='index.html not found', status=404)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if etag in request.headers.get('If-None-Match', ''):
+        return web.Response(status=304, headers=headers)
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        headers['Content-Encoding'] = 'gzip'
+        body = body_gz
+    return web.Response(body=body, content_type='text/html', charset='utf-8', headers=headers)
+
+
+async def _transcribe(client: AsyncOpenAI, path: str) -> str:
+    # A PathLike file is read asynchronously by the SDK
+    resp = await client.audio.transcriptions.create(
+        model=TRANSCRIBE_MODEL,
+        file=pathlib.Path(path),
+    )
+    return getattr(resp, 'text', None) or str(resp)
+
+
+def _chat_messages(question_text: str) -> list:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": question_text},
+    ]
+
+
+async def _chat(client: AsyncOpenAI, question_text: str) -> str:
+    resp = await client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=_chat_messages(question_text),
+        temperature=0.7,
+    )
+    return resp.choices[0].message.content
+
+
+async def _tts_to_mp3(client: AsyncOpenAI, text: str, out_path: str) -> None:
+    async with client.audio.speech.with_streaming_response.create(
+        model=TTS_MODEL,
+        voice=TTS_VOICE,
+        input=text,
+    ) as resp:
+        await resp.stream_to_file(out_path)
+
+
+_SENTENCE_END = re.compile(r'[.!?](?=\s)')
+
+
+async def _tts_bytes(client: AsyncOpenAI, text: str) -> bytes:
+    resp = await client.audio.speech.create(model=TTS_MODEL, voice=TTS_VOICE, input=text)
+    return resp.content
+
+
+async def _answer_to_mp3(client: AsyncOpenAI, question_text: str, out_path: str) -> str:
+    """Chat, then speak the answer into out_path; returns the answer text."""
+    if TTS_SEGMENT_CHARS <= 0:
+        answer_text = await _chat(client, question_text)
+        await _tts_to_mp3(client, answer_text, out_path)
+        return answer_text
+
+    stream = await client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=_chat_messages(question_text),
+        temperature=0.7,
+        stream=True,
+    )
+    parts = []
+    pending = ''
+    tts_tasks = []
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            pending += delta
+            if len(pending) < TTS_SEGMENT_CHARS:
+                continue
+            # Cut after the last complete sentence so each segment reads naturally
+            cut = None
+            for cut in _SENTENCE_END.finditer(pending):
+                pass
+            if cut is not None:
+                segment, pending = pending[:cut.end()], pending[cut.end():]
+                tts_tasks.append(asyncio.create_task(_tts_bytes(client, segment.strip())))
+        if pending.strip():
+            tts_tasks.append(asyncio.create_task(_tts_bytes(client, pending.strip())))
+        segments = await asyncio.gather(*tts_tasks)
+    except BaseException:
+        for task in tts_tasks:
+            task.cancel()
+        raise
+    if not segments:
+        # Never hand MuseTalk an empty answer.mp3
+        raise RuntimeError('chat completion returned no answer text')
+    # MP3 frames concatenate into one playable file
+    async with aiofiles.open(out_path, 'wb') as f:
+        for segment in segments:
+            await f.write(segment)
+    return ''.join(parts)
 
 
 async def save_audio_handler(request: web.Request) -> web.Response:
     try:
         if request.content_length and request.content_length > MAX_AUDIO_SIZE:
-            return web.json_response({'error': 'Request too large'}, status=413)
+            return json_response({'error': 'Request too large'}, status=413)
 
-        data = await request.json()
-        audio_data = data.get('audio_data')
-        fps = str(data.get('fps', '25'))
-        batch_size = str(data.get('batch_size', '20'))
-        musetalk_base_url = MUSETALK_URL
-        mode = (data.get('mode') or 'pipeline').strip().lower()
-
-        if not audio_data:
-            return web.json_response({'error': 'No audio data received'}, status=400)
+        filepath = os.path.join(UPLOAD_FOLDER, 'input.wav')
 
-        if audio_data.startswith('data:audio/wav;base64,'):
-            audio_data = audio_data.split(',', 1)[1]
+        if request.content_type == 'multipart/form-data':
+            # Stream the raw WAV part straight to disk; other parts are settings
+            data = {}
+            audio_size = 0
+            audio_hash = hashlib.sha256()
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name != 'audio':
+                    data[part.name] = await part.text()
+                    continue
+                async with aiofiles.open(filepath, 'wb') as f:
+                    while True:
+                        chunk = await part.read_chunk(UPLOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        audio_size += len(chunk)
+                        if audio_size > MAX_AUDIO_SIZE:
+                            return json_response({'error': 'Audio file too large'}, status=413)
+                        audio_hash.update(chunk)
+                        await f.write(chunk)
+            if not audio_size:
+                return json_response({'error': 'No audio data received'}, status=400)
+        else:
+            # Legacy JSON body with a base64 data URL
+            data = orjson.loads(await request.read())
+            audio_data = data.get('audio_data')
+            if not audio_data:
+                return json_response({'error': 'No audio data received'}, status=400)
 
-        try:
-            audio_bytes = base64.b64decode(audio_data)
-        except Exception as e:
-            return web.json_response({'error': f'Invalid audio data: {e}'}, status=400)
+            try:
+                # Work on bytes and strip the data URL prefix with a view, not a copy
+                audio_data = audio_data.encode('ascii')
+                payload = memoryview(audio_data)
+                if audio_data.startswith(AUDIO_DATA_URL_PREFIX):
+                    payload = payload[len(AUDIO_DATA_URL_PREFIX):]
+                audio_bytes = await asyncio.to_thread(base64.b64decode, payload, validate=False)
+            except Exception as e:
+                return json_response({'error': f'Invalid audio data: {e}'}, status=400)
 
-        if len(audio_bytes) > MAX_AUDIO_SIZE:
-            return web.json_response({'error': 'Audio file too large'}, status=413)
+            # validate=False skips non-alphabet characters, so garbage decodes to nothing
+            if not audio_bytes:
+                return json_response({'error': 'No audio data received'}, status=400)
+            if len(audio_bytes) > MAX_AUDIO_SIZE:
+                return json_response({'error': 'Audio file too large'}, status=413)
 
-        filepath = os.path.join(UPLOAD_FOLDER, 'input.wav')
-        with open(filepath, 'wb') as f:
-            f.write(audio_bytes)
+            async with aiofiles.open(filepath, 'wb') as f:
+                await f.write(audio_bytes)
+            audio_hash = await asyncio.to_thread(hashlib.sha256, audio_bytes)
         saved_at = datetime.now().isoformat()
 
+        fps = str(data.get('fps', '25'))
+        batch_size = str(data.get('batch_size', '20'))
+        mode = (data.get('mode') or 'pipeline').strip().lower()
+
         # === Mode selection ===
-        openai_api_key = os.getenv('OPENAI_API_KEY')
-        if not openai_api_key:
-            return web.json_response({'error': 'OPENAI_API_KEY not set on server'}, status=500)
-        client = OpenAI(api_key=openai_api_key)
+        client = request.app[OPENAI_CLIENT]
+        if client is None:
+            return json_response({'error': 'OPENAI_API_KEY not set on server'}, status=500)
 
         answer_mp3_path = os.path.join(UPLOAD_FOLDER, 'answer.mp3')
         transcript_text = ''
@@ -120,38 +483,21 @@ async def save_audio_handler(request: web.Request) -> web.Response:
         answer_content_type = 'audio/mpeg'
 
         if mode == 'pipeline':
-            def _transcribe(path: str) -> str:
-                with open(path, 'rb') as af:
-                    resp = client.audio.transcriptions.create(
-                        model=os.getenv('TRANSCRIBE_MODEL', 'whisper-1'),
-                        file=af,
-                    )
-                return getattr(resp, 'text', None) or str(resp)
-
-            def _chat(question_text: str) -> str:
-                resp = client.chat.completions.create(
-                    model=os.getenv('CHAT_MODEL', 'gpt-4o-mini'),
-                    messages=[
-                        {"role": "system", "content": os.getenv('SYSTEM_PROMPT', 'You are a concise, helpful assistant.')},
-                        {"role": "user", "content": question_text},
-                    ],
-                    temperature=0.7,
-                )
-                return resp.choices[0].message.content
-
-            def _tts_to_mp3(text: str, out_path: str) -> None:
-                voice = os.getenv('TTS_VOICE', 'alloy')
-                model = os.getenv('TTS_MODEL', 'tts-1')
-                with client.audio.speech.with_streaming_response.create(
-                    model=model,
-                    voice=voice,
-                    input=text,
-                ) as resp:
-                    resp.stream_to_file(out_path)
-
-            transcript_text = await asyncio.to_thread(_transcribe, filepath)
-            answer_text = await asyncio.to_thread(_chat, transcript_text)
-            await asyncio.to_thread(_tts_to_mp3, answer_text, answer_mp3_path)
+            cache_key = _response_cache_key(audio_hash.digest())
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                # Same recording under the same models and prompt: skip all three OpenAI calls
+                response_cache.move_to_end(cache_key)
+                transcript_text, answer_text, mp3_bytes = cached
+                async with aiofiles.open(answer_mp3_path, 'wb') as f:
+                    await f.write(mp3_bytes)
+                logger.info('pipeline: response cache hit')
+            else:
+                transcript_text = await _transcribe(client, filepath)
+                answer_text = await _answer_to_mp3(client, transcript_text, answer_mp3_path)
+                if RESPONSE_CACHE_MAX > 0:
+                    async with aiofiles.open(answer_mp3_path, 'rb') as f:
+                        _response_cache_put(cache_key, (transcript_text, answer_text, await f.read()))
             answer_saved_at = datetime.now().isoformat()
             answer_filename = 'answer.mp3'
             answer_content_type = 'audio/mpeg'
@@ -160,24 +506,23 @@ async def save_audio_handler(request: web.Request) -> web.Response:
             # Note: using Responses API compatible call via python SDK
             # Attach input audio and request audio output
             try:
-                from openai import OpenAI as _Client
-                _c = client
-                with open(filepath, 'rb') as af:
-                    audio_bytes = af.read()
-                # Build input as base64 data URL for audio
-                b64 = base64.b64encode(audio_bytes).decode('ascii')
+                async with aiofiles.open(filepath, 'rb') as af:
+                    audio_bytes = await af.read()
+                # Build input as base64 data URL for audio; encoding up to 100MB stays off the loop
+                b64 = await asyncio.to_thread(b64encode_str, audio_bytes)
+                del audio_bytes
                 data_url = f"data:audio/wav;base64,{b64}"
                 # Ask the model to produce audio (mp3) and a short text answer
-                result = _c.responses.create(
-                    model=os.getenv('REALTIME_MODEL', 'gpt-4o-mini-tts'),
+                result = await client.responses.create(
+                    model=REALTIME_MODEL,
                     input=[
                         {"role": "user", "content": [
-                            {"type": "input_text", "text": os.getenv('SYSTEM_PROMPT', 'You are a concise, helpful assistant. Please respond to the user audio.')},
+                            {"type": "input_text", "text": REALTIME_PROMPT},
                             {"type": "input_audio", "audio": {"data": data_url}},
                         ]}
                     ],
                     modalities=["text", "audio"],
-                    audio={"voice": os.getenv('TTS_VOICE', 'alloy'), "format": "mp3"}
+                    audio={"voice": TTS_VOICE, "format": "mp3"}
                 )
                 # Extract audio and text from response
                 audio_parts = []
@@ -192,8 +537,8 @@ async def save_audio_handler(request: web.Request) -> web.Response:
                         text_parts.append(getattr(out, 'content', ''))
                 if audio_parts:
                     mp3_bytes = base64.b64decode(''.join(audio_parts))
-                    with open(answer_mp3_path, 'wb') as outf:
-                        outf.write(mp3_bytes)
+                    async with aiofiles.open(answer_mp3_path, 'wb') as outf:
+                        await outf.write(mp3_bytes)
                     answer_saved_at = datetime.now().isoformat()
                 else:
                     answer_saved_at = datetime.now().isoformat()
@@ -204,58 +549,35 @@ async def save_audio_handler(request: web.Request) -> web.Response:
             except Exception as e:
                 logger.exception('realtime mode failed; falling back to pipeline')
                 # fallback to pipeline if realtime not available
-                def _transcribe(path: str) -> str:
-                    with open(path, 'rb') as af:
-                        resp = client.audio.transcriptions.create(
-                            model=os.getenv('TRANSCRIBE_MODEL', 'whisper-1'),
-                            file=af,
-                        )
-                    return getattr(resp, 'text', None) or str(resp)
-                def _chat(question_text: str) -> str:
-                    resp = client.chat.completions.create(
-                        model=os.getenv('CHAT_MODEL', 'gpt-4o-mini'),
-                        messages=[
-                            {"role": "system", "content": os.getenv('SYSTEM_PROMPT', 'You are a concise, helpful assistant.')},
-                            {"role": "user", "content": question_text},
-                        ],
-                        temperature=0.7,
-                    )
-                    return resp.choices[0].message.content
-                def _tts_to_mp3(text: str, out_path: str) -> None:
-                    voice = os.getenv('TTS_VOICE', 'alloy')
-                    model = os.getenv('TTS_MODEL', 'tts-1')
-                    with client.audio.speech.with_streaming_response.create(
-                        model=model,
-                        voice=voice,
-                        input=text,
-                    ) as resp:
-                        resp.stream_to_file(out_path)
-                transcript_text = await asyncio.to_thread(_transcribe, filepath)
-                answer_text = await asyncio.to_thread(_chat, transcript_text)
-                await asyncio.to_thread(_tts_to_mp3, answer_text, answer_mp3_path)
+                transcript_text = await _transcribe(client, filepath)
+                answer_text = await _answer_to_mp3(client, transcript_text, answer_mp3_path)
                 answer_saved_at = datetime.now().isoformat()
                 answer_filename = 'answer.mp3'
                 answer_content_type = 'audio/mpeg'
         elif mode == 'user_audio':
             # Convert the recorded WAV to MP3 using ffmpeg if available; otherwise fall back to WAV
-            import subprocess
-            ffmpeg_bin = os.getenv('FFMPEG_PATH', 'ffmpeg')
             try:
                 # Ensure any existing file is removed
                 try:
                     os.remove(answer_mp3_path)
                 except FileNotFoundError:
                     pass
-                # Run ffmpeg conversion
-                cmd = [ffmpeg_bin, '-y', '-i', filepath, '-codec:a', 'libmp3lame', '-q:a', '2', answer_mp3_path]
-                result = await asyncio.to_thread(lambda: subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True))
-                if result.returncode == 0 and os.path.exists(answer_mp3_path):
+                # Run ffmpeg as a loop-managed child; only errors go to stderr so little is buffered
+                proc = await asyncio.create_subprocess_exec(
+                    FFMPEG_PATH, '-nostdin', '-loglevel', 'error', '-y', '-i', filepath,
+                    '-codec:a', 'libmp3lame', '-q:a', '2', answer_mp3_path,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                _, stderr = await proc.communicate()
+                if proc.returncode == 0 and os.path.exists(answer_mp3_path):
                     answer_saved_at = datetime.now().isoformat()
                     answer_filename = 'answer.mp3'
                     answer_content_type = 'audio/mpeg'
                     logger.info('User audio converted to MP3 via ffmpeg')
                 else:
-                    raise RuntimeError(f"ffmpeg failed: rc={result.returncode}, stderr={result.stderr[-400:]}" )
+                    raise RuntimeError(f"ffmpeg failed: rc={proc.returncode}, stderr={stderr[-400:].decode('utf-8', 'replace')}")
             except Exception as conv_err:
                 logger.warning(f'FFmpeg conversion failed, sending WAV instead: {conv_err}')
                 # Fall back to WAV: use input.wav as the audio to send
@@ -267,14 +589,9 @@ async def save_audio_handler(request: web.Request) -> web.Response:
             transcript_text = ''
             answer_text = ''
         else:
-            return web.json_response({'error': f"Unknown mode '{mode}'"}, status=400)
-
-        # Normalize MuseTalk base URL and build process endpoint
-        musetalk_base_url = str(musetalk_base_url).strip()
-        if musetalk_base_url.endswith('/'):
-            musetalk_base_url = musetalk_base_url[:-1]
-        if not (musetalk_base_url.startswith('http://') or musetalk_base_url.startswith('https://')):
-            musetalk_base_url = 'http://' + musetalk_base_url
+            return json_response({'error': f"Unknown mode '{mode}'"}, status=400)
+
+        musetalk_base_url = normalize_musetalk_url(MUSETALK_URL)
         musetalk_url = musetalk_base_url + '/process'
 
         # Build a public callback URL for MuseTalk to POST frames back to this app
@@ -284,116 +601,335 @@ async def save_audio_handler(request: web.Request) -> web.Response:
         host = xf_host or request.host
         stream_url = f"{scheme}://{host}/stream_frames"
 
-        form = aiohttp.FormData()
-        # Send audio to MuseTalk
-        form.add_field('audio', open(answer_mp3_path, 'rb'), filename=answer_filename, content_type=answer_content_type)
-        form.add_field('stream_url', stream_url)
-        form.add_field('fps', fps)
-        form.add_field('batch_size', batch_size)
-        form.add_field('bbox_shift', '0')
-
-        timeout = aiohttp.ClientTimeout(total=120)
-        async with ClientSession(timeout=timeout) as session:
+        # Open off the event loop; aiohttp sizes a file part with fstat (so the upload
+        # keeps its Content-Length), reads it in the executor and closes it once sent
+        audio_file = await asyncio.to_thread(open, answer_mp3_path, 'rb')
+        try:
+            form = aiohttp.FormData()
+            # Send audio to MuseTalk
+            form.add_field('audio', audio_file, filename=answer_filename, content_type=answer_content_type)
+            form.add_field('stream_url', stream_url)
+            form.add_field('fps', fps)
+            form.add_field('batch_size', batch_size)
+            form.add_field('bbox_shift', '0')
+
+            session = request.app[MUSETALK_SESSION]
             async with session.post(musetalk_url, data=form) as resp:
                 text = await resp.text()
-                return web.json_response({
-                    'success': resp.status == 200,
-                    'message': 'Answer audio forwarded to MuseTalk',
-                    'musetalk_response': text,
-                    'stream_url': stream_url,
-                    'saved_at': saved_at,
-                    'transcript': transcript_text,
-                    'answer': answer_text,
-                    'answer_audio_path': answer_mp3_path,
-                    'answer_saved_at': answer_saved_at,
-                    'answer_audio_url': f"{scheme}://{host}/uploads/{answer_filename}",
-                }, status=200 if resp.status == 200 else 502)
+        finally:
+            # Already closed after a successful send; this covers failures before the body went out
+            audio_file.close()
+        if USE_MJPEG_INGEST and resp.status == 200:
+            _start_mjpeg_ingest(session, musetalk_base_url + '/mjpeg_stream')
+        return json_response({
+            'success': resp.status == 200,
+            'message': 'Answer audio forwarded to MuseTalk',
+            'musetalk_response': text,
+            'stream_url': stream_url,
+            'saved_at': saved_at,
+            'transcript': transcript_text,
+            'answer': answer_text,
+            'answer_audio_path': answer_mp3_path,
+            'answer_saved_at': answer_saved_at,
+            'answer_audio_url': f"{scheme}://{host}/uploads/{answer_filename}",
+        }, status=200 if resp.status == 200 else 502)
 
     except Exception as e:
         logger.exception('save_audio_handler error')
-        return web.json_response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
 
 
-async def stream_frames_handler(request: web.Request) -> web.Response:
-    """Persistent NDJSON (one JSON object per line) receiver from MuseTalk."""
-    global frame_buffer, processing_complete, start_signal_received
-    logger.info('=== stream_frames started ===')
+@dataclass
+class _IngestStats:
+    lines: int = 0
+    frames: int = 0
+    batches: int = 0
 
-    buf = b''
-    total_lines = 0
-    total_frames_received = 0
 
-    def process_line(line: str):
-        nonlocal total_lines, total_frames_received
-        total_lines += 1
-        line = line.strip()
-        if not line:
-            return
-        try:
-            msg = json.loads(line)
-        except json.JSONDecodeError:
+def _on_start_signal(msg: dict) -> None:
+    global start_signal_received
+    start_signal_received = True
+    logger.info('Start signal received')
+
+
+def _on_finished_signal(msg: dict) -> None:
+    global processing_complete
+    processing_complete = True
+    logger.info('Finished signal received')
+    _notify_frame_waiters()
+
+
+_STATUS_HANDLERS = {
+    'start': _on_start_signal,
+    'finished': _on_finished_signal,
+}
+
+
+def _process_ndjson_line(buf: bytearray, start: int, end: int, stats: _IngestStats) -> None:
+    """Handle the line buf[start:end]; it is parsed through a view, never copied out."""
+    stats.lines += 1
+    if start == end:
+        return
+    # Frames come from the MJPEG ingest; only status lines are worth parsing
+    if USE_MJPEG_INGEST and buf.find(b'"status"', start, end) == -1:
+        return
+    try:
+        # orjson skips surrounding whitespace (including a CR from CRLF)
+        with memoryview(buf) as view:
+            msg = orjson.loads(view[start:end])
+    except orjson.JSONDecodeError:
+        if buf[start:end].strip():
             logger.warning('Non-JSON line received; ignoring')
-            return
+        return
+
+    on_status = _STATUS_HANDLERS.get(msg.get('status'))
+    if on_status is not None:
+        on_status(msg)
+        return
+
+    frames = msg.get('frames')
+    if not frames:
+        return
+    # Bind hot-loop callables once per batch
+    append = _append_frame
+    b64decode = base64.b64decode
+    added = 0
+    last_num = None
+    # Frames in one batch arrive together; stamp them once
+    received_at = _now_iso()
+    for fr in frames:
+        b64 = fr.get('frame_data')
+        if not b64:
+            continue
+        # Decode once here so MJPEG viewers can write the JPEG as-is
+        try:
+            jpeg = b64decode(b64, validate=False)
+        except Exception:
+            continue
+        last_num = fr.get('frame_number', 0)
+        # Keep only the JPEG: the wire base64 is ~1.33x its size and would sit outside
+        # the byte budget; _frame_json re-encodes for the few JSON pollers
+        append(last_num, jpeg, received_at)
+        added += 1
+    stats.frames += added
+    if added:
+        _notify_frame_waiters()
+    stats.batches += 1
+    if FRAME_LOG_EVERY and stats.batches % FRAME_LOG_EVERY == 0:
+        logger.info('Received %d frames (last #%s); buffer size=%d (%d bytes, %d evicted); total_frames_received=%d',
+                    added, last_num, len(frame_buffer), frame_buffer_bytes, frames_evicted, stats.frames)
 
-        status = msg.get('status')
-        if status == 'start':
-            start_signal_received = True
-            logger.info('Start signal received')
-            return
-        if status == 'finished':
-            processing_complete = True
-            logger.info('Finished signal received')
-            return
 
-        frames = msg.get('frames', [])
-        if frames:
-            added = 0
-            last_num = None
-            for fr in frames:
-                b64 = fr.get('frame_data')
-                if not b64:
-                    continue
-                last_num = fr.get('frame_number', 0)
-                frame_buffer.append({
-                    'frame_number': last_num,
-                    'frame_data': b64,
-                    'timestamp': datetime.now().isoformat(),
-                })
-                added += 1
-            total_frames_received += added
-            logger.info(f"Received {added} frames (last #{last_num}); buffer size={len(frame_buffer)}; total_frames_received={total_frames_received}")
+async def stream_frames_handler(request: web.Request) -> web.Response:
+    """Persistent NDJSON (one JSON object per line) receiver from MuseTalk."""
+    logger.info('=== stream_frames started ===')
+
+    buf = bytearray()
+    pos = 0  # start of the first unprocessed line in buf
+    stats = _IngestStats()
 
     try:
-        async for chunk in request.content.iter_chunked(65536):
+        async for chunk, _ in request.content.iter_chunks():
             if not chunk:
                 continue
-            buf += chunk
+            # Bytes before the old end were already searched for a newline
+            search_from = max(pos, len(buf))
+            buf.extend(chunk)
             while True:
-                idx = buf.find(b"\n")
+                idx = buf.find(b"\n", search_from)
                 if idx == -1:
                     break
-                line_bytes = buf[:idx]
-                buf = buf[idx+1:]
-                process_line(line_bytes.decode('utf-8', errors='ignore'))
-
-        if buf:
-            process_line(buf.decode('utf-8', errors='ignore'))
-
-        logger.info(f"=== stream_frames completed: lines={total_lines}, total_frames_received={total_frames_received}, buffer_size={len(frame_buffer)} ===")
-        return web.json_response({'ok': True, 'lines': total_lines, 'frames': total_frames_received})
+                _process_ndjson_line(buf, pos, idx, stats)
+                pos = search_from = idx + 1
+            # Compact only once the consumed prefix is large
+            if pos > NDJSON_COMPACT_THRESHOLD:
+                del buf[:pos]
+                pos = 0
+
+        if pos < len(buf):
+            _process_ndjson_line(buf, pos, len(buf), stats)
+
+        logger.info(f"=== stream_frames completed: lines={stats.lines}, total_frames_received={stats.frames}, buffer_size={len(frame_buffer)} ===")
+        return json_response({'ok': True, 'lines': stats.lines, 'frames': stats.frames})
     except Exception as e:
         logger.exception('stream_frames error')
-        return web.json_response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
     finally:
         logger.info('=== stream_frames ended ===')
 
 
+# /stream_frames_bin records: big-endian u32 frame_number, u32 payload length, payload.
+# The payload is the raw JPEG, or a JSON status object when frame_number is BIN_STATUS_RECORD.
+BIN_RECORD_HEADER = struct.Struct('>II')
+BIN_STATUS_RECORD = 0xFFFFFFFF
+BIN_RECORD_MAX = 16 * 1024 * 1024
+
+
+async def stream_frames_bin_handler(request: web.Request) -> web.Response:
+    """Length-prefixed binary receiver from MuseTalk: raw JPEGs, no base64 or JSON per frame."""
+    logger.info('=== stream_frames_bin started ===')
+
+    buf = bytearray()
+    pos = 0  # start of the first unprocessed record in buf
+    stats = _IngestStats()
+    header_size = BIN_RECORD_HEADER.size
+
+    try:
+        async for chunk, _ in request.content.iter_chunks():
+            if not chunk:
+                continue
+            buf.extend(chunk)
+            added = 0
+            last_num = None
+            received_at = None
+            with memoryview(buf) as view:
+                while len(buf) - pos >= header_size:
+                    frame_number, length = BIN_RECORD_HEADER.unpack_from(buf, pos)
+                    if length > BIN_RECORD_MAX:
+                        return json_response({'error': f'Record too large: {length} bytes'}, status=400)
+                    end = pos + header_size + length
+                    if len(buf) < end:
+                        break
+                    body_start = pos + header_size
+                    pos = end
+                    stats.lines += 1
+                    # Sub-views are passed as temporaries so none outlives `view`
+                    if frame_number == BIN_STATUS_RECORD:
+                        try:
+                            msg = orjson.loads(view[body_start:end])
+                        except orjson.JSONDecodeError:
+                            logger.warning('Invalid status record received; ignoring')
+                            continue
+                        on_status = _STATUS_HANDLERS.get(msg.get('status'))
+                        if on_status is not None:
+                            on_status(msg)
+                        continue
+                    if received_at is None:
+                        received_at = _now_iso()
+                    # Copies the JPEG straight out of the receive buffer into the frame's MJPEG part
+                    _append_frame(frame_number, view[body_start:end], received_at)
+                    last_num = frame_number
+                    added += 1
+            if added:
+                stats.frames += added
+                stats.batches += 1
+                _notify_frame_waiters()
+                if FRAME_LOG_EVERY and stats.batches % FRAME_LOG_EVERY == 0:
+                    logger.info('Received %d frames (last #%s); buffer size=%d (%d bytes, %d evicted); total_frames_received=%d',
+                                added, last_num, len(frame_buffer), frame_buffer_bytes, frames_evicted, stats.frames)
+            if pos > NDJSON_COMPACT_THRESHOLD:
+                del buf[:pos]
+                pos = 0
+
+        if pos < len(buf):
+            logger.warning(f'stream_frames_bin: dropping {len(buf) - pos} bytes of truncated record')
+
+        logger.info(f"=== stream_frames_bin completed: records={stats.lines}, total_frames_received={stats.frames}, buffer_size={len(frame_buffer)} ===")
+        return json_response({'ok': True, 'records': stats.lines, 'frames': stats.frames})
+    except Exception as e:
+        logger.exception('stream_frames_bin error')
+        return json_response({'error': str(e)}, status=500)
+    finally:
+        logger.info('=== stream_frames_bin ended ===')
+
+
+_mjpeg_ingest_task = None
+
+
+def _mjpeg_content_length(headers: bytes):
+    # Parse on bytes; only Content-Length matters and it is plain ASCII digits
+    for line in headers.split(b'\r\n'):
+        if line[:15].lower() == b'content-length:':
+            return int(line[15:].split(b';', 1)[0].strip())
+    return None
+
+
+async def _mjpeg_ingest_worker(session: ClientSession, url: str) -> None:
+    """Buffer each part of a multipart/x-mixed-replace JPEG stream as raw bytes."""
+    logger.info(f'=== MJPEG ingest started: {url} ===')
+    frames = 0
+    try:
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=60)
+        async with session.get(url, timeout=timeout) as resp:
+            if resp.status != 200:
+                logger.warning(f'MJPEG ingest: MuseTalk returned status {resp.status}')
+                return
+            _, _, boundary = resp.headers.get('Content-Type', '').partition('boundary=')
+            delimiter = b'--' + (boundary.strip().strip('"') or 'frame').encode('latin1')
+            buf = bytearray()
+            async for chunk in resp.content.iter_any():
+                buf.extend(chunk)
+                while True:
+                    start = buf.find(delimiter)
+                    if start == -1:
+                        break
+                    after = start + len(delimiter)
+                    if buf[after:after + 2] == b'--':
+                        logger.info('MJPEG ingest: closing boundary received')
+                        return
+                    header_end = buf.find(b'\r\n\r\n', after)
+                    if header_end == -1:
+                        break
+                    body_start = header_end + 4
+                    length = _mjpeg_content_length(bytes(buf[after:header_end]))
+                    if length is not None:
+                        body_end = body_start + length
+                        if len(buf) < body_end:
+                            break
+                        jpeg_end = body_end
+                    else:
+                        # No Content-Length: the part runs up to the next delimiter
+                        body_end = buf.find(delimiter, body_start)
+                        if body_end == -1:
+                            break
+                        jpeg_end = body_end
+                        if buf[jpeg_end - 2:jpeg_end] == b'\r\n' and jpeg_end - 2 >= body_start:
+                            jpeg_end -= 2
+                    if jpeg_end > body_start:
+                        # base64 is produced on demand for JSON clients; the temporary view
+                        # is copied once into the frame's MJPEG part and released before del
+                        with memoryview(buf) as view:
+                            _append_frame(frames, view[body_start:jpeg_end], _now_iso())
+                        frames += 1
+                        _notify_frame_waiters()
+                    del buf[:body_end]
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception('MJPEG ingest error')
+    finally:
+        logger.info(f'=== MJPEG ingest ended: frames={frames} ===')
+
+
+def _start_mjpeg_ingest(session: ClientSession, url: str) -> None:
+    global _mjpeg_ingest_task
+    if _mjpeg_ingest_task is not None and not _mjpeg_ingest_task.done():
+        _mjpeg_ingest_task.cancel()
+    _mjpeg_ingest_task = asyncio.create_task(_mjpeg_ingest_worker(session, url))
+
+
+async def _stop_mjpeg_ingest() -> None:
+    task = _mjpeg_ingest_task
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
 async def clear_buffer_handler(request: web.Request) -> web.Response:
-    global frame_buffer, processing_complete, start_signal_received
+    global frame_base_index, frame_buffer_bytes, processing_complete, start_signal_received
+    # Keep absolute indices monotonic: a viewer's read_index, a pending long-poll or
+    # an in-flight /frame/{index} can never alias a frame of the next session
+    frame_base_index += len(frame_buffer)
     frame_buffer.clear()
+    frame_buffer_bytes = 0
     processing_complete = False
     start_signal_received = False
-    return web.json_response({'success': True})
+    _notify_frame_waiters()
+    return json_response({'success': True})
 
 
 async def options_handler(request: web.Request) -> web.Response:
@@ -402,22 +938,68 @@ async def options_handler(request: web.Request) -> web.Response:
 
 async def config_handler(request: web.Request) -> web.Response:
     try:
-        return web.json_response({
+        return json_response({
             'musetalk_url': MUSETALK_URL,
         })
     except Exception as e:
         logger.exception('config_handler error')
-        return web.json_response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
 
-async def probe_musetalk_handler(request: web.Request) -> web.Response:
+# (host, port) -> (resolved IPs, expiry on the loop clock); repeated probes skip getaddrinfo
+_probe_dns_cache = {}
+
+
+async def _probe_resolve(host: str, port: int):
+    """Return (resolved IPs, whether they came from the probe's DNS cache)."""
+    loop = asyncio.get_running_loop()
+    cached = _probe_dns_cache.get((host, port))
+    if cached is not None and cached[1] > loop.time():
+        return cached[0], True
+    resolved_ips = []
     try:
-        musetalk_base_url = MUSETALK_URL
+        infos = await loop.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+        for family, _, _, _, sockaddr in infos:
+            ip = sockaddr[0]
+            if ip not in resolved_ips:
+                resolved_ips.append(ip)
+    except Exception as e:
+        logger.warning(f'DNS resolution failed for {host}: {e}')
+        return resolved_ips, False
+    if PROBE_DNS_TTL > 0:
+        _probe_dns_cache[(host, port)] = (resolved_ips, loop.time() + PROBE_DNS_TTL)
+    return resolved_ips, False
 
-        musetalk_base_url = str(musetalk_base_url).strip()
-        if musetalk_base_url.endswith('/'):
-            musetalk_base_url = musetalk_base_url[:-1]
-        if not (musetalk_base_url.startswith('http://') or musetalk_base_url.startswith('https://')):
-            musetalk_base_url = 'http://' + musetalk_base_url
+
+async def _probe_tcp(host: str, port: int):
+    """Return (connected, error message) for a quick raw TCP connect."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=2)
+    except asyncio.TimeoutError:
+        return False, 'timed out'
+    except Exception as e:
+        return False, str(e)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return True, None
+
+
+async def _probe_http(session: ClientSession, url: str):
+    """GET the health URL over the probe session; returns (status, content type, body)."""
+    async with session.get(url, headers={'User-Agent': 'AvatarPageProbe/1.0'}) as resp:
+        ct = resp.headers.get('Content-Type', '')
+        try:
+            body = await resp.json(loads=orjson.loads)
+        except Exception:
+            body = await resp.text()
+        return resp.status, ct, body
+
+
+async def probe_musetalk_handler(request: web.Request) -> web.Response:
+    try:
+        musetalk_base_url = normalize_musetalk_url(MUSETALK_URL)
 
         # Build health URL and include our public base for stream registration
         xf_proto = request.headers.get('X-Forwarded-Proto')
@@ -427,105 +1009,186 @@ async def probe_musetalk_handler(request: web.Request) -> web.Response:
         public_base = f"{scheme}://{host}"
         url = musetalk_base_url + '/health' + f"?stream_base={public_base}"
 
-        # Diagnostics: resolve host and attempt a quick TCP connect
-        import socket
-        from urllib.parse import urlparse
-        parsed = urlparse(url)
+        # Diagnostics (DNS, raw TCP connect) and the HTTP GET run concurrently, so a
+        # probe costs the slowest of the three instead of their sum
+        parsed = urllib.parse.urlparse(url)
         host = parsed.hostname
         port = parsed.port or (443 if parsed.scheme == 'https' else 80)
-        resolved_ips = []
-        try:
-            infos = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
-            for family, _, _, _, sockaddr in infos:
-                ip = sockaddr[0]
-                if ip not in resolved_ips:
-                    resolved_ips.append(ip)
-        except Exception as e:
-            logger.warning(f'DNS resolution failed for {host}: {e}')
-
-        tcp_ok = False
-        tcp_error = None
-        try:
-            # Prefer IPv4 for simplicity
-            with socket.create_connection((host, port), timeout=2) as s:
-                tcp_ok = True
-        except Exception as e:
-            tcp_error = str(e)
-
-        # Attempt HTTP GET with tighter connect/read timeouts and IPv4 preference
-        timeout = aiohttp.ClientTimeout(total=5, connect=2, sock_connect=2, sock_read=3)
-        connector = aiohttp.TCPConnector(ssl=False, family=socket.AF_INET, force_close=True)
-        async with ClientSession(timeout=timeout, connector=connector) as session:
-            try:
-                async with session.get(url, headers={'User-Agent': 'AvatarPageProbe/1.0'}) as resp:
-                    ct = resp.headers.get('Content-Type', '')
-                    try:
-                        body = await resp.json()
-                    except Exception:
-                        body = await resp.text()
-                    return web.json_response({
-                        'success': resp.status == 200,
-                        'status': resp.status,
-                        'url': url,
-                        'resolved_ips': resolved_ips,
-                        'tcp_connect_ok': tcp_ok,
-                        'tcp_error': tcp_error,
-                        'content_type': ct,
-                        'body': body,
-                    }, status=200 if resp.status == 200 else 502)
-            except Exception as e:
-                logger.exception('HTTP probe to MuseTalk failed')
-                return web.json_response({
-                    'success': False,
-                    'status': None,
-                    'url': url,
-                    'resolved_ips': resolved_ips,
-                    'tcp_connect_ok': tcp_ok,
-                    'tcp_error': tcp_error,
-                    'error': str(e),
-                }, status=504)
+        (resolved_ips, dns_cached), (tcp_ok, tcp_error), http_result = await asyncio.gather(
+            _probe_resolve(host, port),
+            _probe_tcp(host, port),
+            _probe_http(request.app[PROBE_SESSION], url),
+            return_exceptions=True,
+        )
+        if isinstance(http_result, BaseException):
+            logger.error(f'HTTP probe to MuseTalk failed: {http_result!r}')
+            return json_response({
+                'success': False,
+                'status': None,
+                'url': url,
+                'resolved_ips': resolved_ips,
+                'dns_cached': dns_cached,
+                'tcp_connect_ok': tcp_ok,
+                'tcp_error': tcp_error,
+                'error': str(http_result),
+            }, status=504)
+        status, ct, body = http_result
+        return json_response({
+            'success': status == 200,
+            'status': status,
+            'url': url,
+            'resolved_ips': resolved_ips,
+            'dns_cached': dns_cached,
+            'tcp_connect_ok': tcp_ok,
+            'tcp_error': tcp_error,
+            'content_type': ct,
+            'body': body,
+        }, status=200 if status == 200 else 502)
     except Exception as e:
         logger.exception('probe_musetalk error')
-        return web.json_response({'success': False, 'error': str(e)}, status=500)
+        return json_response({'success': False, 'error': str(e)}, status=500)
+
+
+def _frame_json(entry: _Frame) -> dict:
+    # Only the raw JPEG is buffered (and counted against FRAME_BUFFER_MAX_BYTES); JSON
+    # clients page through with from_index, so each frame is encoded about once per poller
+    return {
+        'frame_number': entry.frame_number,
+        'frame_data': b64encode_str(entry.frame_bytes),
+        'timestamp': entry.timestamp,
+    }
+
+
+async def _await_frames_after(start: int, timeout: float) -> None:
+    """Block until a frame at or past `start` is buffered, processing completes or timeout expires."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    # A stale index below the base (e.g. 0 after a clear) means "from the oldest frame"
+    while max(start, frame_base_index) >= frame_base_index + len(frame_buffer) and not processing_complete:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        try:
+            await asyncio.wait_for(_frame_waiter().wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            return
+
+
+async def _frames_since(request: web.Request):
+    """Parse ?from_index=N[&wait=S] and return (absolute index of first entry, entries)."""
+    query = request.rel_url.query
+    start = 0
+    from_index_q = query.get('from_index')
+    if from_index_q is not None:
+        try:
+            start = max(0, int(from_index_q))
+        except ValueError:
+            start = 0
+    # Long-poll: hold the request until there is something new instead of answering empty
+    try:
+        wait = min(max(0.0, float(query.get('wait', 0))), LONG_POLL_MAX)
+    except ValueError:
+        wait = 0.0
+    # Clamp into the buffer: an index past the end (client ahead of a restarted or
+    # cleared server) resyncs to the next frame instead of skipping real ones
+    start = min(max(start, frame_base_index), frame_base_index + len(frame_buffer))
+    if wait:
+        await _await_frames_after(start, wait)
+    offset = min(max(0, start - frame_base_index), len(frame_buffer))
+    return frame_base_index + offset, list(itertools.islice(frame_buffer, offset, offset + FRAME_PAGE_MAX))
 
 
 async def get_frame_buffer_handler(request: web.Request) -> web.Response:
     """Return frames; supports incremental fetch via ?from_index=N"""
     try:
-        from_index_q = request.rel_url.query.get('from_index')
-        if from_index_q is not None:
-            try:
-                start = max(0, int(from_index_q))
-            except ValueError:
-                start = 0
-            frames_slice = frame_buffer[start:]
-            next_index = len(frame_buffer)
-        else:
-            frames_slice = frame_buffer
-            next_index = len(frame_buffer)
-        return web.json_response({
-            'frames': frames_slice,
+        first, frames_slice = await _frames_since(request)
+        return json_response({
+            'frames': [_frame_json(entry) for entry in frames_slice],
             'buffer_size': len(frame_buffer),
-            'next_index': next_index,
+            'next_index': first + len(frames_slice),
+            'has_more': first + len(frames_slice) < frame_base_index + len(frame_buffer),
             'processing_complete': processing_complete,
             'start_signal_received': start_signal_received,
         })
     except Exception as e:
         logger.exception('get_frame_buffer error')
-        return web.json_response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
 
 
-async def mjpeg_stream_handler(request: web.Request) -> web.StreamResponse:
-    boundary = b'--frame\r\n'
-    response = web.StreamResponse(
-        status=200,
-        headers={
-            'Content-Type': 'multipart/x-mixed-replace; boundary=frame',
-            'Cache-Control': 'no-cache',
-            'Connection': 'keep-alive',
-        },
+async def frame_index_handler(request: web.Request) -> web.Response:
+    """Like /get_frame_buffer but without image data; fetch each JPEG from /frame/{index}"""
+    try:
+        first, frames_slice = await _frames_since(request)
+        return json_response({
+            'frames': [
+                {'index': first + i, 'frame_number': entry.frame_number, 'timestamp': entry.timestamp}
+                for i, entry in enumerate(frames_slice)
+            ],
+            'buffer_size': len(frame_buffer),
+            'next_index': first + len(frames_slice),
+            'has_more': first + len(frames_slice) < frame_base_index + len(frame_buffer),
+            'processing_complete': processing_complete,
+            'start_signal_received': start_signal_received,
+        })
+    except Exception as e:
+        logger.exception('frame_index error')
+        return json_response({'error': str(e)}, status=500)
+
+
+async def frame_handler(request: web.Request) -> web.Response:
+    """Return a single buffered frame as raw JPEG by absolute index."""
+    try:
+        index = int(request.match_info['index'])
+    except ValueError:
+        return json_response({'error': 'Invalid frame index'}, status=400)
+    offset = index - frame_base_index
+    if offset < 0 or offset >= len(frame_buffer):
+        return json_response({'error': 'Frame not available'}, status=404)
+    # Frames are evicted and the URL says nothing about the session, so never cache
+    return web.Response(
+        body=frame_buffer[offset].frame_bytes,
+        content_type='image/jpeg',
+        headers={'Cache-Control': 'no-store'},
     )
 
+
+MJPEG_RESPONSE_HEADERS = {
+    'Content-Type': 'multipart/x-mixed-replace; boundary=frame',
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+}
+MJPEG_FRAME_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+MJPEG_FRAME_TRAILER = b'\r\n'
+MJPEG_STREAM_END = b'--frame--\r\n'
+MJPEG_SNDBUF = 4 * 1024 * 1024  # the kernel clamps this to net.core.wmem_max
+MJPEG_IDLE_CHECK = 5.0  # seconds between disconnect checks while no frames arrive
+
+
+def _tune_stream_socket(transport) -> None:
+    # Send each frame immediately and give the kernel room to queue a few JPEGs
+    sock = transport.get_extra_info('socket')
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, MJPEG_SNDBUF)
+    except OSError as e:
+        logger.debug(f'MJPEG: could not tune socket: {e}')
+
+
+async def _wait_for_frames(transport) -> bool:
+    """Wait for a frame notification; False if the viewer disconnected meanwhile."""
+    # The timeout only bounds how long an idle, disconnected viewer lingers
+    try:
+        await asyncio.wait_for(_frame_waiter().wait(), timeout=MJPEG_IDLE_CHECK)
+    except asyncio.TimeoutError:
+        pass
+    return not transport.is_closing()
+
+
+async def mjpeg_stream_handler(request: web.Request) -> web.StreamResponse:
+    response = web.StreamResponse(status=200, headers=MJPEG_RESPONSE_HEADERS)
+
     transport = request.transport
     if transport is None or transport.is_closing():
         logger.info('MJPEG: client transport closing before prepare')
@@ -536,27 +1199,29 @@ async def mjpeg_stream_handler(request: web.Request) -> web.StreamResponse:
     except (ConnectionResetError, asyncio.CancelledError) as e:
         logger.info(f'MJPEG: client disconnected during prepare: {e}')
         return response
+    _tune_stream_socket(transport)
 
-    read_index = 0
+    # Start at the oldest buffered frame; after /clear_buffer the base is past 0
+    read_index = frame_base_index
     first_written = False
     try:
         # Wait for first frame to be available
-        while read_index >= len(frame_buffer) and not processing_complete:
-            await asyncio.sleep(0.02)
+        while read_index >= frame_base_index + len(frame_buffer) and not processing_complete:
+            if not await _wait_for_frames(transport):
+                logger.info('MJPEG: client disconnected while waiting for frames')
+                return response
+            read_index = max(read_index, frame_base_index)
 
         while True:
-            if read_index < len(frame_buffer):
-                entry = frame_buffer[read_index]
+            # Skip ahead if the frames we had not sent yet were evicted or cleared
+            read_index = max(read_index, frame_base_index)
+            offset = read_index - frame_base_index
+            if offset < len(frame_buffer):
+                mjpeg_part = frame_buffer[offset].mjpeg_part
                 read_index += 1
                 try:
-                    frame_bytes = base64.b64decode(entry['frame_data'])
-                except Exception:
-                    continue
-                try:
-                    await response.write(boundary)
-                    await response.write(b'Content-Type: image/jpeg\r\n\r\n')
-                    await response.write(frame_bytes)
-                    await response.write(b'\r\n')
+                    # One write per frame of the part every viewer shares
+                    await response.write(mjpeg_part)
                     if not first_written:
                         logger.info('MJPEG: first frame written to client')
                         first_written = True
@@ -564,13 +1229,15 @@ async def mjpeg_stream_handler(request: web.Request) -> web.StreamResponse:
                     logger.info(f'MJPEG: client disconnected during write: {e}')
                     break
             else:
-                if processing_complete and read_index >= len(frame_buffer):
+                if processing_complete and read_index >= frame_base_index + len(frame_buffer):
                     logger.info('MJPEG: finished and all buffered frames flushed')
                     break
-                await asyncio.sleep(0.01)
+                if not await _wait_for_frames(transport):
+                    logger.info('MJPEG: client disconnected while waiting for frames')
+                    break
     finally:
         try:
-            await response.write(b'--frame--\r\n')
+            await response.write(MJPEG_STREAM_END)
         except Exception:
             pass
         try:
@@ -582,22 +1249,34 @@ async def mjpeg_stream_handler(request: web.Request) -> web.StreamResponse:
 
 def create_app() -> web.Application:
     app = web.Application(client_max_size=MAX_AUDIO_SIZE, middlewares=[cors_middleware])
+    app.cleanup_ctx.append(client_sessions_ctx)
     app.router.add_get('/', index_handler)
     # Generic OPTIONS for all routes (helps some proxies)
     app.router.add_route('OPTIONS', '/{tail:.*}', index_handler)
     app.router.add_post('/save_audio', save_audio_handler)
     app.router.add_post('/stream_frames', stream_frames_handler)
+    app.router.add_post('/stream_frames_bin', stream_frames_bin_handler)
     app.router.add_post('/probe_musetalk', probe_musetalk_handler)
     app.router.add_get('/config', config_handler)
     app.router.add_get('/clear_buffer', clear_buffer_handler)
     app.router.add_get('/get_frame_buffer', get_frame_buffer_handler)
+    app.router.add_get('/frame_index', frame_index_handler)
+    app.router.add_get('/frame/{index}', frame_handler)
     app.router.add_get('/mjpeg_stream', mjpeg_stream_handler)
     # Serve uploads statically so the page can play answer.mp3
     app.router.add_static('/uploads/', path=UPLOAD_FOLDER, name='uploads')
+    # Read the page once up front; index_handler reports a missing template per request
+    if os.path.exists(INDEX_HTML_PATH):
+        _load_index_html()
     return app
 
 
 async def main() -> None:
+    if THREAD_POOL_SIZE > 0:
+        # asyncio.run() shuts the default executor down on exit
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix='aio_default')
+        )
     app = create_app()
     runner = web.AppRunner(app)
     await runner.setup()
@@ -616,6 +1295,13 @@ async def main() -> None:
 
 
 if __name__ == '__main__':
+    # libuv-based loop when available (not on Windows); stdlib loop otherwise
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info('Using uvloop event loop')
+    except ImportError:
+        pass
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
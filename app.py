@@ -1,15 +1,35 @@
 from flask import Flask, render_template, request, jsonify, send_file
 from flask_socketio import SocketIO, emit
 import os
+import collections
+import threading
 from datetime import datetime
-import base64
 import requests
+from requests.adapters import HTTPAdapter
 import subprocess
 import io
 
+# SIMD-accelerated base64 when available; stdlib is API-compatible as a fallback
+try:
+    import pybase64 as base64
+    b64encode_str = base64.b64encode_as_string
+except ImportError:
+    import base64
+
+    def b64encode_str(data):
+        return base64.b64encode(data).decode('ascii')
+
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+AUDIO_DATA_URL_PREFIX = 'data:audio/wav;base64,'
+
+# Pooled keep-alive connections to MuseTalk, shared by every route
+musetalk_session = requests.Session()
+musetalk_session.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=64))
+# Read size for the MJPEG proxy; larger reads mean fewer generator steps per frame
+MJPEG_PROXY_CHUNK = 64 * 1024
+
 # Ensure uploads directory exists
 UPLOAD_FOLDER = 'uploads'
 if not os.path.exists(UPLOAD_FOLDER):
@@ -26,11 +46,20 @@ def handle_disconnect():
     print('Client disconnected from WebSocket')
 
 @socketio.on('request_frames')
-def handle_request_frames():
-    """Send current frame buffer to client via WebSocket"""
+def handle_request_frames(data=None):
+    """Send buffered frames to client via WebSocket; only those after since_frame_number if given"""
     global frame_buffer, processing_complete, start_signal_received
+    since = data.get('since_frame_number') if isinstance(data, dict) else None
+    if since is not None:
+        try:
+            since = int(since)
+        except (TypeError, ValueError):
+            since = None  # unusable cursor: fall back to sending everything
+    _, frames = buffer_snapshot()
+    if since is not None:
+        frames = [f for f in frames if f['frame_number'] > since]
     emit('frame_update', {
-        'frames': frame_buffer,
+        'frames': [frame_socket(f) for f in frames],
         'buffer_size': len(frame_buffer),
         'processing_complete': processing_complete,
         'start_signal_received': start_signal_received
@@ -43,21 +72,31 @@ def index():
 @app.route('/save_audio', methods=['POST'])
 def save_audio():
     try:
-        # Get the audio data and settings from the request
-        audio_data = request.json.get('audio_data')
-        fps = request.json.get('fps', '25')
-        batch_size = request.json.get('batch_size', '20')
-        
-        if not audio_data:
+        upload = request.files.get('audio')
+        if upload is not None:
+            # multipart/form-data, as posted by templates/index.html: raw WAV, no base64
+            fps = request.form.get('fps', '25')
+            batch_size = request.form.get('batch_size', '20')
+            audio_bytes = upload.read()
+        else:
+            # Legacy JSON body with a base64 data URL
+            audio_data = request.json.get('audio_data')
+            fps = request.json.get('fps', '25')
+            batch_size = request.json.get('batch_size', '20')
+
+            if not audio_data:
+                return jsonify({'error': 'No audio data received'}), 400
+
+            # Remove the data URL prefix to get just the base64 data (one slice, no split list)
+            if audio_data.startswith(AUDIO_DATA_URL_PREFIX):
+                audio_data = audio_data[len(AUDIO_DATA_URL_PREFIX):]
+
+            # Decode the base64 data
+            audio_bytes = base64.b64decode(audio_data, validate=False)
+
+        if not audio_bytes:
             return jsonify({'error': 'No audio data received'}), 400
         
-        # Remove the data URL prefix to get just the base64 data
-        if audio_data.startswith('data:audio/wav;base64,'):
-            audio_data = audio_data.split(',')[1]
-        
-        # Decode the base64 data
-        audio_bytes = base64.b64decode(audio_data)
-        
         # Use fixed filename 'input.wav'
         filename = 'input.wav'
         filepath = os.path.join(UPLOAD_FOLDER, filename)
@@ -77,9 +116,10 @@ def save_audio():
             print(f"DEBUG: MuseTalk URL: {musetalk_url}")
             print(f"DEBUG: Stream URL: {stream_url}")
             
-            # Prepare the files and data for the request
+            # Prepare the files and data for the request; the decoded bytes are
+            # already in memory, so don't reopen the file we just wrote
             files = {
-                'audio': ('input.wav', open(filepath, 'rb'), 'audio/wav'),
+                'audio': ('input.wav', audio_bytes, 'audio/wav'),
             }
             
             data = {
@@ -91,7 +131,7 @@ def save_audio():
             
             print(f"DEBUG: Sending request to MuseTalk...")
             # Send request to MuseTalk server
-            response = requests.post(musetalk_url, files=files, data=data)
+            response = musetalk_session.post(musetalk_url, files=files, data=data)
             print(f"DEBUG: MuseTalk response status: {response.status_code}")
             print(f"DEBUG: MuseTalk response: {response.text}")
             
@@ -176,8 +216,9 @@ def receive_frame():
             if buffer_data.get('status') == 'finished':
                 processing_complete = True
                 
-                # Emit WebSocket event for finished signal
+                # Emit WebSocket event for finished signal, after any frames still queued
                 try:
+                    flush_frame_update()
                     socketio.emit('frame_update', {
                         'status': 'finished',
                         'processing_complete': True,
@@ -238,16 +279,21 @@ def receive_frame():
 
                 # Add frames to buffer efficiently - optimized for speed
                 frames_added = 0
+                timestamp = datetime.now().isoformat()  # one timestamp per batch; the frames arrived together
                 for frame_info in frames:
                     frame_number = frame_info.get('frame_number', 0)
                     frame_data = frame_info.get('frame_data', '')
 
                     if frame_data:
-                        # Add to buffer directly (keep as base64 for frontend)
-                        frame_buffer.append({
+                        # Decode once and keep raw JPEG bytes; Socket.IO sends bytes as binary attachments
+                        try:
+                            frame_bytes = base64.b64decode(frame_data, validate=False)
+                        except Exception:
+                            continue
+                        buffer_frame({
                             'frame_number': frame_number,
-                            'frame_data': frame_data,  # Keep as base64 for frontend
-                            'timestamp': datetime.now().isoformat()
+                            'frame_bytes': frame_bytes,
+                            'timestamp': timestamp
                         })
                         frames_added += 1
 
@@ -255,21 +301,14 @@ def receive_frame():
                 if is_final or inference_complete:
                     processing_complete = True
 
-                # Emit WebSocket event for real-time frame updates (optimized)
-                try:
-                    socketio.emit('frame_update', {
-                        'frames': frame_buffer,
-                        'buffer_size': len(frame_buffer),
-                        'processing_complete': processing_complete,
-                        'start_signal_received': start_signal_received,
-                        'new_frames_count': frames_added,
+                # Queue the update; the emit loop coalesces batches into one frame_update per interval
+                with emit_lock:
+                    pending_emit.update({
                         'inference_complete': inference_complete,
                         'frames_sent_so_far': frames_sent_so_far,
                         'batch_number': buffer_data.get('batch_number', 0)  # Add batch number for tracking
                     })
-                    print(f"WebSocket event emitted: {frames_added} new frames, total: {len(frame_buffer)}, batch: {buffer_data.get('batch_number', 0)}")
-                except Exception as ws_error:
-                    print(f"WebSocket emit error: {ws_error}")
+                ensure_emit_loop()
 
                 return jsonify({
                     'success': True,
@@ -293,9 +332,9 @@ def receive_frame():
                 return jsonify({'error': 'No frame data received'}), 400
 
             # Store frame in buffer for frontend access (no file saving)
-            frame_buffer.append({
+            buffer_frame({
                 'frame_number': int(frame_number),
-                'frame_data': base64.b64encode(frame_data).decode('utf-8'),
+                'frame_bytes': frame_data,  # raw JPEG as posted; no base64 round-trip
                 'timestamp': datetime.now().isoformat()
             })
 
@@ -309,12 +348,101 @@ def receive_frame():
         return jsonify({'error': str(e)}), 500
 
 # Global variables for frame management
-frame_buffer = []
+# Bounded: the oldest frames drop out once FRAME_BUFFER_MAX are buffered
+FRAME_BUFFER_MAX = int(os.getenv('FRAME_BUFFER_MAX', '10000'))
+frame_buffer = collections.deque(maxlen=FRAME_BUFFER_MAX)
+# Absolute index of frame_buffer[0]; advances on eviction and on clear so from_index stays valid
+frame_base_index = 0
+# receive_frame appends from one thread while others read; iterating a deque that is
+# being appended to raises RuntimeError, so writers and snapshots share this lock
+frame_lock = threading.Lock()
 total_frames_expected = 0
 audio_duration = 0
 processing_complete = False
 start_signal_received = False
 
+def frame_json(entry):
+    """JSON form of a buffered frame; base64 is produced only for HTTP pollers"""
+    return {
+        'frame_number': entry['frame_number'],
+        'frame_data': b64encode_str(entry['frame_bytes']),
+        'timestamp': entry['timestamp']
+    }
+
+def frame_socket(entry):
+    """Socket.IO form of a buffered frame: same fields as frame_json, frame_data sent as a binary attachment"""
+    return {
+        'frame_number': entry['frame_number'],
+        'frame_data': entry['frame_bytes'],
+        'timestamp': entry['timestamp']
+    }
+
+# Frame updates are coalesced: receive_frame only queues, and one background task
+# emits at most one frame_update per FRAME_EMIT_INTERVAL with every frame since the last
+FRAME_EMIT_INTERVAL = float(os.getenv('FRAME_EMIT_INTERVAL', '0.04'))
+pending_emit = {}  # batch info of the latest queued update; empty when nothing is queued
+emitted_index = 0  # absolute index of the first frame not yet emitted
+emit_lock = threading.Lock()
+emit_loop_started = False
+
+def flush_frame_update():
+    """Emit frames buffered since the last update, if an update is queued"""
+    global emitted_index
+    with emit_lock:
+        if not pending_emit:
+            return
+        # Snapshot under frame_lock before dequeuing, so a failure leaves the update queued
+        base, frames = buffer_snapshot()
+        new_frames = frames[max(0, emitted_index - base):]
+        emitted_index = base + len(frames)
+        batch_info = pending_emit.copy()
+        pending_emit.clear()
+    socketio.emit('frame_update', {
+        'frames': [frame_socket(f) for f in new_frames],  # only frames since the previous update
+        'buffer_size': len(frames),
+        'processing_complete': processing_complete,
+        'start_signal_received': start_signal_received,
+        'new_frames_count': len(new_frames),
+        **batch_info
+    })
+    print(f"WebSocket event emitted: {len(new_frames)} new frames, total: {len(frame_buffer)}, batch: {batch_info.get('batch_number', 0)}")
+
+def emit_loop():
+    while True:
+        socketio.sleep(FRAME_EMIT_INTERVAL)
+        try:
+            flush_frame_update()
+        except Exception as ws_error:
+            print(f"WebSocket emit error: {ws_error}")
+
+def ensure_emit_loop():
+    global emit_loop_started
+    with emit_lock:
+        if emit_loop_started:
+            return
+        emit_loop_started = True
+    socketio.start_background_task(emit_loop)
+
+def buffer_frame(entry):
+    """Append a frame, keeping frame_base_index in step when the deque evicts"""
+    global frame_base_index
+    with frame_lock:
+        if len(frame_buffer) == frame_buffer.maxlen:
+            frame_base_index += 1
+        frame_buffer.append(entry)
+
+def buffer_snapshot():
+    """Return (absolute index of the first frame, list of buffered frames) taken atomically"""
+    with frame_lock:
+        return frame_base_index, list(frame_buffer)
+
+def reset_buffer():
+    """Drop all buffered frames; indices keep counting so stale cursors stay valid"""
+    global frame_base_index
+    with frame_lock:
+        frame_base_index += len(frame_buffer)
+        frame_buffer.clear()
+
 @app.route('/process_audio', methods=['POST'])
 def process_audio():
     try:
@@ -324,7 +452,7 @@ def process_audio():
         
         # Reset frame buffer for new processing session
         global frame_buffer, total_frames_expected, audio_duration, processing_complete, start_signal_received
-        frame_buffer.clear()
+        reset_buffer()
         total_frames_expected = 0
         audio_duration = 0
         processing_complete = False
@@ -339,11 +467,6 @@ def process_audio():
         musetalk_url = "http://localhost:8085/process"
         stream_url = "http://localhost:5000/receive_frame"  # This Flask app's endpoint
         
-        # Prepare the files and data for the request
-        files = {
-            'audio': ('input.wav', open(audio_filepath, 'rb'), 'audio/wav'),
-        }
-        
         data = {
             'stream_url': stream_url,
             'fps': fps,
@@ -351,8 +474,12 @@ def process_audio():
             'bbox_shift': '0'
         }
         
-        # Send request to MuseTalk server
-        response = requests.post(musetalk_url, files=files, data=data)
+        # Send request to MuseTalk server; the with-block closes the file on every path
+        with open(audio_filepath, 'rb') as audio_file:
+            files = {
+                'audio': ('input.wav', audio_file, 'audio/wav'),
+            }
+            response = musetalk_session.post(musetalk_url, files=files, data=data)
         
         if response.status_code == 200:
             return jsonify({
@@ -373,16 +500,19 @@ def process_audio():
 
 @app.route('/get_frame_buffer', methods=['GET'])
 def get_frame_buffer():
-    """Get all frames in the buffer (for frontend to check occasionally)"""
+    """Get frames in the buffer (for frontend to check occasionally); ?from_index=N returns only the tail"""
     global frame_buffer, processing_complete, start_signal_received
 
+    from_index = request.args.get('from_index', 0, type=int)
+    base, frames = buffer_snapshot()
     return jsonify({
-        'frames': frame_buffer,
-        'buffer_size': len(frame_buffer),
+        'frames': [frame_json(f) for f in frames[max(0, from_index - base):]],
+        'next_index': base + len(frames),
+        'buffer_size': len(frames),
         'processing_complete': processing_complete,
         'start_signal_received': start_signal_received,
         'inference_complete': processing_complete,  # For compatibility with new format
-        'frames_sent_so_far': len(frame_buffer)  # For compatibility with new format
+        'frames_sent_so_far': len(frames)  # For compatibility with new format
     })
 
 @app.route('/clear_buffer', methods=['POST'])
@@ -394,7 +524,7 @@ def clear_buffer():
     print(f"DEBUG: Clearing frame buffer")
     print(f"DEBUG: Buffer size before clearing: {len(frame_buffer)}")
 
-    frame_buffer.clear()
+    reset_buffer()
     processing_complete = False
     start_signal_received = False
 
@@ -410,19 +540,27 @@ def mjpeg():
     """Proxy MJPEG stream from Muse service to avoid CORS issues in the browser."""
     try:
         musetalk_mjpeg_url = "http://localhost:8085/mjpeg_stream"
-        with requests.get(musetalk_mjpeg_url, stream=True) as r:
-            return app.response_class(r.iter_content(chunk_size=8192),
-                                      mimetype=r.headers.get('Content-Type', 'multipart/x-mixed-replace; boundary=frame'))
+        r = musetalk_session.get(musetalk_mjpeg_url, stream=True)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    def generate():
+        # Close the upstream response only once the client stops reading
+        try:
+            yield from r.raw.stream(MJPEG_PROXY_CHUNK, decode_content=False)
+        finally:
+            r.close()
+
+    return app.response_class(generate(),
+                              mimetype=r.headers.get('Content-Type', 'multipart/x-mixed-replace; boundary=frame'))
+
 @app.route('/webrtc_offer', methods=['POST'])
 def webrtc_offer():
     """Proxy browser SDP offer to MuseTalk service and return SDP answer."""
     try:
         data = request.get_json(force=True)
         musetalk_webrtc_url = "http://localhost:8085/webrtc_offer"
-        resp = requests.post(musetalk_webrtc_url, json=data, timeout=15)
+        resp = musetalk_session.post(musetalk_webrtc_url, json=data, timeout=15)
         return (resp.text, resp.status_code, resp.headers.items())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -432,10 +570,12 @@ def muse_status():
     """Proxy MuseTalk status to avoid CORS in browser."""
     try:
         musetalk_status_url = "http://localhost:8085/status"
-        resp = requests.get(musetalk_status_url, timeout=5)
+        resp = musetalk_session.get(musetalk_status_url, timeout=5)
         return (resp.text, resp.status_code, resp.headers.items())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
+    # Debug mode (reloader + Werkzeug debugger) only on request; Flask-SocketIO picks
+    # eventlet/gevent over threading automatically when one is installed
+    socketio.run(app, debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)